@@ -0,0 +1 @@
+# Lets pytest import "libs" from the repo root
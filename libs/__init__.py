@@ -0,0 +1,16 @@
+""" TikTok profile scraper library.
+
+The package is not installed with pip: add the folder of this repo to
+the python path and import the modules from "libs":
+
+    import sys
+    sys.path.append("/path/to/tiktok-profile-scraper")
+
+    from libs.scraper import Scraper
+
+    scraper = Scraper(chrome_path, max_users=10, max_videos=50)
+    for profile in scraper.iter_profiles("pasteles"):
+        ...
+
+Chrome opens with the first search and is reused by the next calls.
+"""
@@ -0,0 +1,300 @@
+import gzip
+import json
+import importlib
+from time import sleep, perf_counter
+
+
+class ReplayError(Exception):
+    """ Raised when the replayed traffic does not match the requested calls """
+
+
+def open_traffic_file(path: str, mode: str):
+    """ Open a traffic file, compressed with gzip when the path ends with .gz
+
+    Args:
+        path(str): path of the traffic file
+        mode(str): "r" to read or "w" to write
+    """
+
+    if path.endswith(".gz"):
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def dump_error(error: Exception) -> dict:
+    """ Json data of an exception, to raise it again in replay mode
+
+    Args:
+        error(Exception): exception raised by a call
+    """
+
+    return {
+        "module": type(error).__module__,
+        "type": type(error).__name__,
+        "message": str(error),
+    }
+
+
+def load_error(error_data: dict) -> Exception:
+    """ Exception saved with dump_error
+
+    Args:
+        error_data(dict): module, type and message of the exception
+    """
+
+    try:
+        module = importlib.import_module(error_data["module"])
+        error_class = getattr(module, error_data["type"])
+        return error_class(error_data["message"])
+    except (ImportError, AttributeError, TypeError):
+        return ReplayError(
+            f"Recorded {error_data['type']}: {error_data['message']}"
+        )
+
+
+class _RecordedDomain():
+
+    def __init__(self, recorder, domain: str):
+        """ Cdp domain (Page, Runtime, etc) who logs every command
+
+        Args:
+            recorder(CdpRecorder): recorder who writes the traffic
+            domain(str): name of the cdp domain
+        """
+
+        self.recorder = recorder
+        self.domain = domain
+
+    def __getattr__(self, method: str):
+
+        def command(**params):
+            chrome_domain = getattr(self.recorder.chrome, self.domain)
+            entry = {
+                "type": "command",
+                "method": f"{self.domain}.{method}",
+                "params": params,
+            }
+            start = perf_counter()
+            try:
+                entry["response"] = getattr(chrome_domain, method)(**params)
+            except Exception as error:
+                # Save the error to raise it again in replay mode
+                entry["error"] = dump_error(error)
+                self.recorder.write(entry, start)
+                raise
+
+            self.recorder.write(entry, start)
+            return entry["response"]
+
+        return command
+
+
+class CdpRecorder():
+
+    def __init__(self, chrome, record_path: str):
+        """ Wrap a PyChromeDevTools interface and log every command,
+        response and event to a json lines file
+
+        Args:
+            chrome(PyChromeDevTools.ChromeInterface): connected chrome interface
+            record_path(str): file to save the traffic (gzip if ends with .gz)
+        """
+
+        self.chrome = chrome
+        self.file = open_traffic_file(record_path, "w")
+        self.start_time = perf_counter()
+
+    def __getattr__(self, attr: str):
+
+        # Cdp domains start with upper case (Page, Runtime, DOM...)
+        if attr[:1].isupper():
+            domain = _RecordedDomain(self, attr)
+            setattr(self, attr, domain)
+            return domain
+
+        return getattr(self.chrome, attr)
+
+    def write(self, entry: dict, start: float):
+        """ Save a single entry in the traffic file, with its timings
+
+        Args:
+            entry(dict): command or event data
+            start(float): perf_counter value before the call
+        """
+
+        end = perf_counter()
+        entry["offset"] = round(start - self.start_time, 4)
+        entry["elapsed"] = round(end - start, 4)
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def wait_event(self, event: str, timeout: float = None):
+        """ Wait for specific cdp event and log it
+
+        Args:
+            event(str): name of the event
+            timeout(float, optional): max seconds to wait. Defaults to None.
+        """
+
+        entry = {
+            "type": "event",
+            "method": event,
+        }
+        start = perf_counter()
+        try:
+            entry["response"] = self.chrome.wait_event(event, timeout=timeout)
+        except Exception as error:
+            entry["error"] = dump_error(error)
+            self.write(entry, start)
+            raise
+
+        self.write(entry, start)
+        return entry["response"]
+
+    def record_value(self, name: str, value):
+        """ Log a value read outside cdp (like process memory), to
+        serve it in replay mode
+
+        Args:
+            name(str): name of the value
+            value(any): json serializable value
+        """
+
+        self.write({
+            "type": "value",
+            "method": name,
+            "response": value,
+        }, perf_counter())
+
+    def close(self):
+        """ Close traffic file and chrome conexion """
+
+        if not self.file.closed:
+            self.file.close()
+        self.chrome.close()
+
+
+class _ReplayDomain():
+
+    def __init__(self, replayer, domain: str):
+        """ Cdp domain (Page, Runtime, etc) who returns recorded responses
+
+        Args:
+            replayer(CdpReplayer): replayer who reads the traffic
+            domain(str): name of the cdp domain
+        """
+
+        self.replayer = replayer
+        self.domain = domain
+
+    def __getattr__(self, method: str):
+
+        def command(**params):
+            return self.replayer.next_response(
+                "command",
+                f"{self.domain}.{method}",
+                params
+            )
+
+        return command
+
+
+class CdpReplayer():
+
+    def __init__(self, replay_path: str, realtime: bool = False):
+        """ Fake PyChromeDevTools interface who serves the responses of
+        a traffic file, in the same order they were recorded
+
+        Args:
+            replay_path(str): traffic file created by CdpRecorder
+            realtime(bool, optional): Wait (true) the original latency
+                of each call. Defaults to False.
+        """
+
+        self.realtime = realtime
+        with open_traffic_file(replay_path, "r") as file:
+            self.entries = [json.loads(line) for line in file if line.strip()]
+        self.position = 0
+
+    def __getattr__(self, attr: str):
+
+        if attr[:1].isupper():
+            domain = _ReplayDomain(self, attr)
+            setattr(self, attr, domain)
+            return domain
+
+        raise AttributeError(attr)
+
+    def next_entry(self, entry_type: str, method: str,
+                   params: dict = None) -> dict:
+        """ Return the next recorded entry, validating the call order
+        and the params of the commands, or raise the recorded error
+
+        Args:
+            entry_type(str): "command", "event" or "value"
+            method(str): cdp method, event name or value name
+            params(dict, optional): command params. Defaults to None.
+
+        Returns:
+            dict: recorded entry
+        """
+
+        if self.position >= len(self.entries):
+            raise ReplayError(f"Traffic exhausted, unexpected call: {method}")
+
+        entry = self.entries[self.position]
+        if entry["type"] != entry_type or entry["method"] != method:
+            raise ReplayError(
+                f"Call {self.position}: expected {entry['method']}, got {method}"
+            )
+        if entry_type == "command":
+            # Same format than the recorded params (tuples as lists, etc)
+            params = json.loads(json.dumps(params or {}))
+            if entry["params"] != params:
+                raise ReplayError(
+                    f"Call {self.position} ({method}): expected params "
+                    f"{entry['params']}, got {params}"
+                )
+        self.position += 1
+
+        if self.realtime:
+            sleep(entry["elapsed"])
+
+        if "error" in entry:
+            raise load_error(entry["error"])
+
+        return entry
+
+    def next_response(self, entry_type: str, method: str,
+                      params: dict = None) -> tuple:
+        """ Return the next recorded response (see next_entry)
+
+        Returns:
+            tuple: recorded response (result, messages)
+        """
+
+        return tuple(self.next_entry(entry_type, method, params)["response"])
+
+    def replay_value(self, name: str):
+        """ Return the next value logged with CdpRecorder.record_value
+
+        Args:
+            name(str): name of the value
+        """
+
+        return self.next_entry("value", name)["response"]
+
+    def wait_event(self, event: str, timeout: float = None) -> tuple:
+        """ Return the recorded event
+
+        Args:
+            event(str): name of the event
+            timeout(float, optional): ignored, kept for compatibility.
+        """
+
+        return self.next_response("event", event)
+
+    def close(self):
+        """ Nothing to close in replay mode """
+
+        pass
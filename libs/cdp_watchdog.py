@@ -0,0 +1,210 @@
+import json
+import websocket
+from time import time
+
+
+# Errors of a closed websocket or a dead browser (not replay or code errors)
+TRANSPORT_ERRORS = (websocket.WebSocketException, OSError)
+
+
+class ChromeError(Exception):
+    """ Chrome can't be started or stopped responding """
+
+
+class ChromeTimeoutError(ChromeError):
+    """ A cdp command didn't answer before its deadline """
+
+
+class ChromeCrashedError(ChromeError):
+    """ The renderer of the current tab crashed """
+
+
+class ChromeCommandError(ChromeError):
+    """ Chrome answered a cdp command with an error (like a missing node) """
+
+
+CRASH_EVENT = "Inspector.targetCrashed"
+
+
+def check_crash(messages: list):
+    """ Raise error if the messages received include a crash event
+
+    Args:
+        messages(list): cdp messages received while waiting a response
+    """
+
+    for message in messages:
+        if message and message.get("method") == CRASH_EVENT:
+            raise ChromeCrashedError("Tab crashed (Inspector.targetCrashed)")
+
+
+class _ConnectionDomain():
+
+    def __init__(self, connection, domain: str):
+        """ Cdp domain (Page, Runtime, etc) who sends the commands
+        with the connection
+
+        Args:
+            connection(CdpConnection): connection to chrome
+            domain(str): name of the cdp domain
+        """
+
+        self.connection = connection
+        self.domain = domain
+
+    def __getattr__(self, method: str):
+
+        def command(**params):
+            return self.connection.send(f"{self.domain}.{method}", params)
+
+        return command
+
+
+class CdpConnection():
+
+    def __init__(self, chrome):
+        """ Wrap a PyChromeDevTools interface to send the commands over its
+        websocket, returning also the error replies (PyChromeDevTools waits
+        the whole timeout for them) and the messages received since the
+        previous command (PyChromeDevTools discards them)
+
+        Args:
+            chrome(PyChromeDevTools.ChromeInterface): connected chrome interface
+        """
+
+        self.chrome = chrome
+
+    def __getattr__(self, attr: str):
+
+        # Cdp domains start with upper case (Page, Runtime, DOM...)
+        if attr[:1].isupper():
+            domain = _ConnectionDomain(self, attr)
+            setattr(self, attr, domain)
+            return domain
+
+        return getattr(self.chrome, attr)
+
+    def send(self, method: str, params: dict) -> tuple:
+        """ Send cdp command and wait its response or error reply
+
+        Args:
+            method(str): cdp method, like "Page.navigate"
+            params(dict): command params
+
+        Returns:
+            tuple: response (None if timeout) and all messages received
+        """
+
+        chrome = self.chrome
+
+        # Events received while the scraper was waiting (crashes included)
+        messages = chrome.pop_messages()
+
+        chrome.message_counter += 1
+        message_id = chrome.message_counter
+        chrome.ws.send(json.dumps({
+            "id": message_id,
+            "method": method,
+            "params": params,
+        }))
+
+        deadline = time() + chrome.timeout
+        try:
+            while time() < deadline:
+                chrome.ws.settimeout(max(deadline - time(), 0.01))
+                try:
+                    message = json.loads(chrome.ws.recv())
+                except websocket.WebSocketTimeoutException:
+                    continue
+                messages.append(message)
+                if message.get("id") == message_id:
+                    return (message, messages)
+        finally:
+            chrome.ws.settimeout(chrome.timeout)
+
+        return (None, messages)
+
+
+class _WatchedDomain():
+
+    def __init__(self, watchdog, domain: str):
+        """ Cdp domain (Page, Runtime, etc) who validates every response
+
+        Args:
+            watchdog(CdpWatchdog): watchdog who checks the responses
+            domain(str): name of the cdp domain
+        """
+
+        self.watchdog = watchdog
+        self.domain = domain
+
+    def __getattr__(self, method: str):
+
+        def command(**params):
+            chrome_domain = getattr(self.watchdog.chrome, self.domain)
+            try:
+                response = getattr(chrome_domain, method)(**params)
+            except TRANSPORT_ERRORS as error:
+                # Websocket closed or browser gone
+                raise ChromeError(f"{self.domain}.{method} failed: {error}")
+
+            result, messages = response
+            check_crash(messages)
+            if result is None:
+                raise ChromeTimeoutError(
+                    f"{self.domain}.{method} without response after "
+                    f"{self.watchdog.command_timeout}s"
+                )
+            if "error" in result:
+                raise ChromeCommandError(
+                    f"{self.domain}.{method} failed: "
+                    f"{result['error'].get('message')}"
+                )
+            return response
+
+        return command
+
+
+class CdpWatchdog():
+
+    def __init__(self, chrome, command_timeout: float):
+        """ Wrap a PyChromeDevTools interface and raise ChromeError
+        when a command times out or fails, the tab crashes or the
+        conexion drops
+
+        Args:
+            chrome(CdpConnection): chrome interface (or its recorder)
+            command_timeout(float): max seconds to wait for each command
+        """
+
+        self.chrome = chrome
+        self.command_timeout = command_timeout
+
+    def __getattr__(self, attr: str):
+
+        # Cdp domains start with upper case (Page, Runtime, DOM...)
+        if attr[:1].isupper():
+            domain = _WatchedDomain(self, attr)
+            setattr(self, attr, domain)
+            return domain
+
+        return getattr(self.chrome, attr)
+
+    def wait_event(self, event: str, timeout: float = None) -> tuple:
+        """ Wait for specific cdp event, checking crashes in the meantime
+
+        Args:
+            event(str): name of the event
+            timeout(float, optional): max seconds to wait. Defaults to None.
+
+        Returns:
+            tuple: matching message (None if timeout) and all messages
+        """
+
+        try:
+            response = self.chrome.wait_event(event, timeout=timeout)
+        except TRANSPORT_ERRORS as error:
+            raise ChromeError(f"Waiting {event} failed: {error}")
+
+        check_crash(response[1])
+        return response
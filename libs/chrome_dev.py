@@ -1,15 +1,29 @@
 import os
-import sys
+import json
 import psutil
+import websocket
 from time import sleep
+from urllib.request import Request, urlopen
 import PyChromeDevTools
+from libs.cdp_traffic import CdpRecorder, CdpReplayer
+from libs.cdp_watchdog import (
+    CdpConnection, CdpWatchdog, ChromeError, ChromeCommandError,
+    TRANSPORT_ERRORS
+)
+from libs.identity_pool import IdentityBlockedError
 
 
 class ChromDevWrapper():
     
     def __init__(self, chrome_path, port: int = 9222,
                  proxy_host: str = "", proxy_port: str = "",
-                 start_chrome: bool = True, start_killing: bool = True):
+                 start_chrome: bool = True, start_killing: bool = True,
+                 record_path: str = "", replay_path: str = "",
+                 replay_realtime: bool = False, command_timeout: float = 10,
+                 page_timeout: float = 60, max_attempts: int = 3,
+                 max_navigations: int = 50, max_heap_mb: float = 512,
+                 max_nodes: int = 200000, max_rss_mb: float = 4096,
+                 identity_pool=None, lazy_start: bool = False):
         """ Open chrome and conhect using PyChromeDevTools
 
         Args:
@@ -19,40 +33,566 @@ class ChromDevWrapper():
             start_chrome(bool, optional): Open new chrome instance. Defaults to True.
             start_killing(bool, optional): Kill (true) chrome before start.
                 Defaults to True.
+            record_path(str, optional): Save cdp traffic in this file.
+                Defaults to "".
+            replay_path(str, optional): Serve cdp traffic from this file,
+                without chrome. Defaults to "".
+            replay_realtime(bool, optional): Keep (true) original latencies
+                and waits in replay mode. Defaults to False.
+            command_timeout(float, optional): Max seconds to wait for each
+                cdp command. Defaults to 10.
+            page_timeout(float, optional): Max seconds to wait for a page
+                to load. Defaults to 60.
+            max_attempts(int, optional): Attempts of each operation run
+                with "retry". Defaults to 3.
+            max_navigations(int, optional): Recycle the tab after this
+                number of pages. 0 to disable. Defaults to 50.
+            max_heap_mb(float, optional): Recycle the tab when its js heap
+                is bigger. 0 to disable. Defaults to 512.
+            max_nodes(int, optional): Recycle the tab when it has more dom
+                nodes. 0 to disable. Defaults to 200000.
+            max_rss_mb(float, optional): Restart chrome when its processes
+                use more memory. 0 to disable. Defaults to 4096.
+            identity_pool(IdentityPool, optional): Proxies and cookies to
+                browse with, each one in its own browser context.
+                Defaults to None (use chrome proxy and cookies).
+            lazy_start(bool, optional): Open chrome (true) in the first
+                command instead of now. Defaults to False.
+                
+        Raises:
+            ChromeError: Chrome path not found or chrome not open
+        """
+        
+        self.base_wait_time = 2
+        self.chrome_path = chrome_path
+        self.port = port
+        self.proxy_host = proxy_host
+        self.proxy_port = proxy_port
+        self.start_chrome = start_chrome
+        self.command_timeout = command_timeout
+        self.page_timeout = page_timeout
+        self.max_attempts = max_attempts
+        self.max_navigations = max_navigations
+        self.max_heap_mb = max_heap_mb
+        self.max_nodes = max_nodes
+        self.max_rss_mb = max_rss_mb
+        self.navigations = 0
+        self.identity_pool = identity_pool
+        self.identity = None
+        self.context_id = ""
+        self.start_killing = start_killing
+        self.record_path = record_path
+        self.replay_path = replay_path
+        self.replay_realtime = replay_realtime
+        self.replaying = bool(replay_path)
+        self.skip_waits = self.replaying and not replay_realtime
+        self.tab_id = ""
+        self.chrome_interface = None
+        
+        if not lazy_start:
+            self.start()
+            
+    @property
+    def chrome(self):
+        """ Chrome interface, opening chrome if it is not open yet """
+        
+        if self.chrome_interface is None:
+            self.start()
+        return self.chrome_interface
+        
+    def start(self):
+        """ Open chrome and conhect (if not already done)
+        
+        Raises:
+            ChromeError: Chrome path not found or chrome not open
         """
         
-        # Validate chrome path
-        if not os.path.exists(chrome_path):
-            print(f"Chrome path not found: {chrome_path}")
-            sys.exit()
+        if self.chrome_interface is not None:
+            return None
         
-        if start_killing:
-            self.quit()
+        if self.replaying:
+            # Replay recorded traffic without chrome
+            chrome = CdpReplayer(self.replay_path, self.replay_realtime)
+        else:
+            
+            # Validate chrome path
+            if self.start_chrome and not os.path.exists(self.chrome_path):
+                raise ChromeError(f"Chrome path not found: {self.chrome_path}")
             
-        if start_chrome:
-            command = f'"{chrome_path}" --remote-debugging-port={port} '
-            command += '--remote-allow-origins=*'
-            if proxy_host != "" and proxy_port != "":
-                # Start chrome with proxies
-                command += f' --proxy-server={proxy_host}:{proxy_port}'
+            if self.start_killing:
+                self.quit()
                 
-            os.popen(command)
+            if self.start_chrome:
+                self.__launch_chrome__()
+            
+            try:
+                chrome = PyChromeDevTools.ChromeInterface(
+                    port=self.port,
+                    timeout=self.command_timeout
+                )
+            except Exception:
+                raise ChromeError(
+                    "Chrome is not open. "
+                    "Please open chrome with the custom shorcut and try again."
+                )
+            self.tab_id = chrome.tabs[0]["id"]
+            chrome = CdpConnection(chrome)
+            
+            if self.record_path:
+                chrome = CdpRecorder(chrome, self.record_path)
+            
+        self.chrome_interface = CdpWatchdog(chrome, self.command_timeout)
+        try:
+            self.__enable_domains__()
+            if self.identity_pool:
+                self.rotate_identity()
+        except Exception:
+            # Start again from scratch in the next call
+            self.chrome_interface = None
+            chrome.close()
+            raise
+        
+    def __launch_chrome__(self):
+        """ Open new chrome instance in debug mode """
+        
+        command = f'"{self.chrome_path}" --remote-debugging-port={self.port} '
+        command += '--remote-allow-origins=*'
+        if self.proxy_host != "" and self.proxy_port != "":
+            # Start chrome with proxies
+            command += f' --proxy-server={self.proxy_host}:{self.proxy_port}'
+            
+        os.popen(command)
+            
+        sleep(1)
+        
+    def __enable_domains__(self):
+        """ Enable the cdp events used by the wrapper """
+        
+        self.chrome.Network.enable()
+        self.chrome.Page.enable()
+        self.chrome.Inspector.enable()
+        self.chrome.Performance.enable()
+        
+    def __devtools_request__(self, path: str, method: str = "GET",
+                             parse_json: bool = True):
+        """ Call chrome devtools http endpoint
+
+        Args:
+            path(str): endpoint path, after /json
+            method(str, optional): http method. Defaults to "GET".
+            parse_json(bool, optional): Parse (true) the response as json.
+                Defaults to True.
+            
+        Returns:
+            dict, list or str: endpoint response
+        """
+        
+        url = f"http://localhost:{self.port}/json{path}"
+        request = Request(url, method=method)
+        with urlopen(request, timeout=self.command_timeout) as response:
+            content = response.read().decode("utf-8")
+        
+        if parse_json:
+            return json.loads(content)
+        return content
+        
+    def __browser_command__(self, method: str, **params) -> dict:
+        """ Run cdp command in the browser target (not in the tab)
+
+        Args:
+            method(str): cdp method
+            **params: cdp method params
+            
+        Returns:
+            dict: command result
+            
+        Raises:
+            ChromeError: command failed or timed out
+        """
+        
+        try:
+            url = self.__devtools_request__("/version")["webSocketDebuggerUrl"]
+            browser = websocket.create_connection(
+                url,
+                timeout=self.command_timeout
+            )
+        except TRANSPORT_ERRORS as error:
+            raise ChromeError(f"Browser target not available: {error}")
+        
+        try:
+            browser.send(json.dumps({"id": 1, "method": method, "params": params}))
+            while True:
+                message = json.loads(browser.recv())
+                if message.get("id") == 1:
+                    break
+        except TRANSPORT_ERRORS as error:
+            raise ChromeError(f"{method} failed: {error}")
+        finally:
+            browser.close()
+        
+        if "error" in message:
+            raise ChromeError(f"{method} failed: {message['error']}")
+        return message["result"]
+        
+    def __connect_tab__(self, tab_id: str):
+        """ Connect the websocket to specific tab
+
+        Args:
+            tab_id(str): devtools id of the tab
+        """
+        
+        self.chrome.get_tabs()
+        tab_ids = [tab["id"] for tab in self.chrome.tabs]
+        self.chrome.connect(tab=tab_ids.index(tab_id), update_tabs=False)
+        self.tab_id = tab_id
+        
+    def __recreate_tab__(self):
+        """ Open a new tab, close the current one and connect to the new one """
+        
+        new_tab = self.__devtools_request__("/new?about:blank", "PUT")
+        
+        # Chrome answers in plain text ("Target is closing")
+        try:
+            self.__devtools_request__(f"/close/{self.tab_id}", parse_json=False)
+        except OSError:
+            pass
+        self.__connect_tab__(new_tab["id"])
+        
+    def __kill_chrome__(self):
+        """ Kill only the chrome of the wrapper (see __get_chrome_processes__)
+        and wait until it closes, keeping other chrome windows open """
+        
+        processes = self.__get_chrome_processes__()
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(processes, timeout=self.base_wait_time)
+        
+    def __restart_browser__(self):
+        """ Kill chrome, open it again and connect to its first tab """
+        
+        if self.start_chrome:
+            self.__kill_chrome__()
+            self.__launch_chrome__()
+        
+        for _ in range(self.max_attempts):
+            try:
+                tabs = self.__devtools_request__()
+                pages = [tab for tab in tabs if tab["type"] == "page"]
+                self.__connect_tab__(pages[0]["id"])
+                return None
+            except Exception:
+                sleep(self.base_wait_time)
                 
-            sleep(1)
+        raise ChromeError("Chrome is not responding after restart")
         
-        self.base_wait_time = 2
+    def recover(self, restart_browser: bool = False):
+        """ Replace the current tab (or the whole browser) after an error
+
+        Args:
+            restart_browser(bool, optional): Restart (true) chrome instead
+                of only recreating the tab. Defaults to False.
+        """
         
+        self.navigations = 0
+        
+        if self.identity:
+            self.__recover_identity__(restart_browser)
+            return None
+        
+        if not self.replaying:
+            if restart_browser:
+                print("\t\tRestarting chrome...")
+                self.__restart_browser__()
+            else:
+                print("\t\tRecreating tab...")
+                try:
+                    self.__recreate_tab__()
+                except (ChromeError, ValueError, *TRANSPORT_ERRORS):
+                    print("\t\tTab can't be recreated, restarting chrome...")
+                    self.__restart_browser__()
+                
+        self.__enable_domains__()
+        
+    def __recover_identity__(self, restart_browser: bool):
+        """ Replace the identity browser context (and its tab), instead of
+        opening a tab in the default context
+
+        Args:
+            restart_browser(bool): Restart (true) chrome before
+        """
+        
+        if restart_browser and not self.replaying:
+            print("\t\tRestarting chrome...")
+            self.__restart_browser__()
+        
+        print("\t\tRecreating identity context...")
         try:
-            self.chrome = PyChromeDevTools.ChromeInterface(port=port)
-        except Exception:
-            print(
-                "Chrome is not open",
-                "Please open chrome with the custom shorcut and try again."
+            self.use_identity(self.identity)
+        except ChromeError:
+            if restart_browser or self.replaying:
+                raise
+            print("\t\tContext can't be recreated, restarting chrome...")
+            self.__restart_browser__()
+            self.use_identity(self.identity)
+        
+    def use_identity(self, identity):
+        """ Browse in a new browser context with the proxy and cookies
+        of the identity, closing the previous context
+
+        Args:
+            identity(Identity): proxy and cookies to use
+        """
+        
+        if not self.replaying:
+            context_params = {"disposeOnDetach": False}
+            if identity.proxy:
+                context_params["proxyServer"] = identity.proxy
+            context = self.__browser_command__(
+                "Target.createBrowserContext",
+                **context_params
+            )
+            target = self.__browser_command__(
+                "Target.createTarget",
+                url="about:blank",
+                browserContextId=context["browserContextId"]
             )
-            sys.exit(1)
+            self.__connect_tab__(target["targetId"])
             
-        self.chrome.Network.enable()
-        self.chrome.Page.enable()
+            # Close old context and its tabs
+            if self.context_id:
+                try:
+                    self.__browser_command__(
+                        "Target.disposeBrowserContext",
+                        browserContextId=self.context_id
+                    )
+                except ChromeError:
+                    pass
+            self.context_id = context["browserContextId"]
+        
+        self.identity = identity
+        self.navigations = 0
+        self.__enable_domains__()
+        if identity.cookies:
+            self.set_cookies(identity.cookies)
+        
+    def rotate_identity(self, blocked: bool = False):
+        """ Change to the healthiest identity of the pool
+
+        Args:
+            blocked(bool, optional): The current identity was blocked.
+                Defaults to False.
+        """
+        
+        if self.identity:
+            if blocked:
+                self.identity_pool.report_block(self.identity)
+            self.identity_pool.release(self.identity)
+        
+        identity = self.identity_pool.acquire(exclude=self.identity)
+        print(f"\t\tUsing identity {identity.name}")
+        try:
+            self.use_identity(identity)
+        except Exception:
+            self.identity_pool.release(identity)
+            raise
+        
+    def report_identity(self, success: bool, latency: float = 0):
+        """ Save request result in the identity stats, and change identity
+        when the request was a latency spike. The latency is saved in the
+        traffic file, and read from it in replay mode, to detect the same
+        spikes
+
+        Args:
+            success(bool): request finished without errors
+            latency(float, optional): request seconds. Defaults to 0.
+        """
+        
+        if not self.identity:
+            return None
+        
+        if self.replaying:
+            latency = self.chrome.replay_value("identity_latency")
+        elif self.record_path:
+            self.chrome.record_value("identity_latency", latency)
+        
+        spike = self.identity_pool.report(self.identity, success, latency)
+        if spike:
+            print(f"\t\tLatency spike with identity {self.identity.name}")
+            try:
+                self.rotate_identity()
+            except ChromeError as error:
+                print(f"\t\tIdentity can't be changed: {error}")
+        
+    def __get_chrome_processes__(self) -> list:
+        """ Chrome process running with the debug port of the wrapper,
+        and its children (renderers, gpu, etc), without other chromes
+        
+        Returns:
+            list: psutil processes
+        """
+        
+        port_flag = f"--remote-debugging-port={self.port}"
+        for process in psutil.process_iter(['name', 'cmdline']):
+            name = process.info['name'] or ''
+            cmdline = process.info['cmdline'] or []
+            if 'chrome' in name.lower() and port_flag in cmdline:
+                try:
+                    return [process] + process.children(recursive=True)
+                except psutil.Error:
+                    return [process]
+        return []
+        
+    def get_chrome_rss_mb(self) -> float:
+        """ Memory used by the chrome processes of the wrapper.
+        The value is saved in the traffic file, and read from it in replay
+        mode, to take the same recycling decisions
+        
+        Returns:
+            float: resident memory in MB
+        """
+        
+        if self.replaying:
+            return self.chrome.replay_value("chrome_rss_mb")
+        
+        rss = 0
+        for process in self.__get_chrome_processes__():
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                pass
+        rss_mb = rss / 1024 / 1024
+        
+        if self.record_path:
+            self.chrome.record_value("chrome_rss_mb", rss_mb)
+        return rss_mb
+        
+    def get_metrics(self) -> dict:
+        """ Resource usage of the current tab and chrome
+
+        Returns:
+            dict: metrics
+            {
+                "heap_mb": float,
+                "nodes": int,
+                "layouts": int,
+                "documents": int,
+                "rss_mb": float,
+                "navigations": int
+            }
+        """
+        
+        response = self.chrome.Performance.getMetrics()
+        try:
+            values = {
+                metric["name"]: metric["value"]
+                for metric in response[0]["result"]["metrics"]
+            }
+        except Exception:
+            values = {}
+        
+        return {
+            "heap_mb": values.get("JSHeapUsedSize", 0) / 1024 / 1024,
+            "nodes": int(values.get("Nodes", 0)),
+            "layouts": int(values.get("LayoutCount", 0)),
+            "documents": int(values.get("Documents", 0)),
+            "rss_mb": self.get_chrome_rss_mb(),
+            "navigations": self.navigations,
+        }
+        
+    def govern_resources(self) -> dict:
+        """ Log resource usage and recycle the tab (or restart chrome)
+        when a limit is exceeded. Call it between pages.
+
+        Returns:
+            dict: metrics before recycling (see get_metrics)
+        """
+        
+        metrics = self.get_metrics()
+        print(
+            f"\t\tChrome: heap {metrics['heap_mb']:.0f}MB, "
+            f"nodes {metrics['nodes']}, layouts {metrics['layouts']}, "
+            f"rss {metrics['rss_mb']:.0f}MB, pages {metrics['navigations']}"
+        )
+        
+        if self.max_rss_mb and metrics["rss_mb"] > self.max_rss_mb:
+            print("\t\tChrome memory limit reached")
+            self.recover(restart_browser=True)
+            return metrics
+        
+        tab_limits = [
+            (self.max_navigations, metrics["navigations"], "pages"),
+            (self.max_heap_mb, metrics["heap_mb"], "js heap"),
+            (self.max_nodes, metrics["nodes"], "dom nodes"),
+        ]
+        for limit, value, name in tab_limits:
+            if limit and value >= limit:
+                print(f"\t\tTab {name} limit reached")
+                self.recover()
+                break
+        
+        return metrics
+        
+    def retry(self, function, *args, **kwargs):
+        """ Run function, recovering chrome and trying again if it fails.
+        The first error recreates the tab, the next ones restart chrome.
+        When the identity is blocked, it changes to other identity.
+
+        Args:
+            function(callable): function to run
+            *args, **kwargs: function arguments
+            
+        Returns:
+            any: function return
+            
+        Raises:
+            ChromeError: function failed in all the attempts
+        """
+        
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return function(*args, **kwargs)
+            except ChromeError as error:
+                self.handle_error(error, attempt)
+                
+    def handle_error(self, error: ChromeError, attempt: int):
+        """ Recover after a failed attempt (see retry): change identity if
+        blocked, else recreate the tab (first attempt) or restart chrome.
+        Command errors (like a missing node) only try again.
+
+        Args:
+            error(ChromeError): error of the attempt
+            attempt(int): number of the attempt, from 1
+            
+        Raises:
+            ChromeError: the error, if it was the last attempt
+        """
+        
+        if isinstance(error, IdentityBlockedError):
+            print(f"\t\tBlocked ({attempt}/{self.max_attempts}): {error}")
+            if self.identity:
+                self.rotate_identity(blocked=True)
+        elif isinstance(error, ChromeCommandError):
+            print(f"\t\tCommand error ({attempt}/{self.max_attempts}): {error}")
+        else:
+            print(f"\t\tChrome error ({attempt}/{self.max_attempts}): {error}")
+            self.recover(restart_browser=attempt > 1)
+            
+        if attempt == self.max_attempts:
+            raise error
+        
+    def wait(self, seconds: float):
+        """ Wait between actions (skipped when replaying traffic at full speed)
+
+        Args:
+            seconds(float): seconds to wait
+        """
+        
+        if self.skip_waits:
+            return None
+        sleep(seconds)
         
     def count_elems(self, selector: str) -> int:
         """ Count elemencts who match with specific css selector
@@ -79,15 +619,24 @@ class ChromDevWrapper():
         """
         
         self.chrome.Page.navigate(url=page)
-        self.chrome.wait_event("Page.frameStoppedLoading", timeout=60)
-        sleep(self.base_wait_time)
+        self.navigations += 1
+        loaded, _ = self.chrome.wait_event(
+            "Page.frameStoppedLoading",
+            timeout=self.page_timeout
+        )
+        
+        # Page still loading: validate the tab is responding
+        if not loaded:
+            self.chrome.Runtime.evaluate(expression="document.readyState")
+            
+        self.wait(self.base_wait_time)
         
     def delete_cookies(self):
         """ Delete all cookies in chrome
         """
         
         self.chrome.Network.clearBrowserCookies()
-        sleep(self.base_wait_time)
+        self.wait(self.base_wait_time)
     
     def set_cookies(self, cookies: list):
         """ Set cookies in chrome
@@ -111,7 +660,7 @@ class ChromDevWrapper():
             except Exception:
                 pass
                 
-        sleep(self.base_wait_time)
+        self.wait(self.base_wait_time)
             
     def send_data_js(self, selector: str, data: str):
         """ Send data to specific input, with js
@@ -123,7 +672,7 @@ class ChromDevWrapper():
         
         script = f"document.querySelector('{selector}').value = '{data}';"
         self.chrome.Runtime.evaluate(expression=script)
-        sleep(self.base_wait_time)
+        self.wait(self.base_wait_time)
         
     def send_data(self, selector: str, data: str):
         """ Send data to specific input using chrome api
@@ -148,7 +697,7 @@ class ChromDevWrapper():
                 text=char,
                 unmodifiedText=char
             )
-        sleep(self.base_wait_time)
+        self.wait(self.base_wait_time)
                 
     def click(self, selector: str):
         """ Click on specific element
@@ -159,7 +708,7 @@ class ChromDevWrapper():
         
         script = f"document.querySelector('{selector}').click();"
         self.chrome.Runtime.evaluate(expression=script)
-        sleep(self.base_wait_time)
+        self.wait(self.base_wait_time)
         
     def get_text(self, selector: str) -> str:
         """ Get text of visible element
@@ -270,7 +819,7 @@ class ChromDevWrapper():
         """
         
         response = self.chrome.Runtime.evaluate(expression=script)
-        sleep(self.base_wait_time)
+        self.wait(self.base_wait_time)
         if response[0]['result']["result"]["type"] == "undefined":
             return None
         return response[0]['result']["result"]["value"]
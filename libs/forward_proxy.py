@@ -0,0 +1,122 @@
+""" Local forwarding proxy, to test identity rotation without real proxies.
+
+Usage:
+    python -m libs.forward_proxy 8081 [delay]
+"""
+
+import sys
+import socket
+import select
+import threading
+from time import sleep
+from urllib.parse import urlsplit
+from socketserver import ThreadingTCPServer, StreamRequestHandler
+
+
+class ForwardProxyHandler(StreamRequestHandler):
+
+    # Unbuffered, to forward the body bytes not read with the headers
+    rbufsize = 0
+
+    def handle(self):
+        """ Forward a single http or https (CONNECT) request """
+
+        request_line = self.rfile.readline().decode("latin-1")
+        try:
+            method, target, version = request_line.split()
+        except ValueError:
+            return None
+
+        headers = []
+        while True:
+            line = self.rfile.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            headers.append(line)
+
+        if self.server.delay:
+            sleep(self.server.delay)
+
+        # Open conexion with the real server
+        if method == "CONNECT":
+            host, port = target.rsplit(":", 1)
+        else:
+            url = urlsplit(target)
+            host, port = url.hostname, url.port or 80
+        try:
+            remote = socket.create_connection((host, int(port)), timeout=30)
+        except OSError:
+            self.wfile.write(b"HTTP/1.1 502 Bad Gateway\r\n\r\n")
+            return None
+
+        with self.server.lock:
+            self.server.requests += 1
+
+        if method == "CONNECT":
+            self.wfile.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+        else:
+            path = url.path or "/"
+            if url.query:
+                path += f"?{url.query}"
+            remote.sendall(f"{method} {path} {version}\r\n".encode("latin-1"))
+            remote.sendall(b"".join(headers) + b"\r\n")
+
+        self.__pipe__(remote)
+        remote.close()
+
+    def __pipe__(self, remote: socket.socket):
+        """ Copy data in both directions until one side closes
+
+        Args:
+            remote(socket.socket): conexion with the real server
+        """
+
+        sockets = [self.connection, remote]
+        while True:
+            readable, _, _ = select.select(sockets, [], [], 30)
+            if not readable:
+                break
+            for sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    return None
+                other = remote if sock is self.connection else self.connection
+                other.sendall(data)
+
+
+class ForwardProxy(ThreadingTCPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, delay: float = 0):
+        """ Proxy who forwards requests without changes, counting them
+
+        Args:
+            port(int): local port to listen
+            delay(float, optional): seconds to wait before each request,
+                to simulate slow proxies. Defaults to 0.
+        """
+
+        super().__init__(("127.0.0.1", port), ForwardProxyHandler)
+        self.delay = delay
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def start(self) -> threading.Thread:
+        """ Serve in background thread
+
+        Returns:
+            threading.Thread: server thread
+        """
+
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1])
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    print(f"Forward proxy running in 127.0.0.1:{port}")
+    ForwardProxy(port, delay).serve_forever()
@@ -0,0 +1,232 @@
+import json
+import threading
+from time import time
+from libs.cdp_watchdog import ChromeError
+
+
+class IdentityBlockedError(ChromeError):
+    """ The website blocked the current identity (captcha, rate limit) """
+
+
+class Identity():
+
+    def __init__(self, name: str = "", proxy_host: str = "",
+                 proxy_port: str = "", cookies: list = None):
+        """ Proxy and cookies used to browse, with its health stats
+
+        Args:
+            name(str, optional): name to show in logs. Defaults to proxy.
+            proxy_host(str, optional): Proxy ip. Defaults to "" (no proxy).
+            proxy_port(str, optional): Proxy port. Defaults to "".
+            cookies(list, optional): cookies to set (see set_cookies).
+                Defaults to None.
+        """
+
+        self.proxy_host = proxy_host
+        self.proxy_port = str(proxy_port)
+        self.cookies = cookies or []
+        self.name = name or self.proxy or "direct"
+
+        # Health stats
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.blocks = 0
+        self.total_latency = 0
+        self.active_time = 0
+        self.acquired_at = 0
+        self.cooldown_until = 0
+        self.in_use = False
+
+    @property
+    def proxy(self) -> str:
+        """ Proxy server as host:port ("" without proxy) """
+
+        if self.proxy_host and self.proxy_port:
+            return f"{self.proxy_host}:{self.proxy_port}"
+        return ""
+
+    @property
+    def average_latency(self) -> float:
+        """ Average seconds of the successful requests """
+
+        if not self.successes:
+            return 0
+        return self.total_latency / self.successes
+
+    @property
+    def score(self) -> float:
+        """ Health between 0 and 1: success rate, penalized by blocks """
+
+        success_rate = (self.successes + 1) / (self.requests + 2)
+        return success_rate / (1 + self.blocks)
+
+    @property
+    def throughput(self) -> float:
+        """ Successful requests per minute while the identity was in use """
+
+        active_time = self.active_time
+        if self.in_use:
+            active_time += time() - self.acquired_at
+        if not active_time:
+            return 0
+        return self.successes / active_time * 60
+
+
+class IdentityPool():
+
+    def __init__(self, identities: list, block_cooldown: float = 600,
+                 spike_factor: float = 3, spike_min_requests: int = 3):
+        """ Rotate identities between workers, choosing the healthiest
+
+        Args:
+            identities(list): Identity instances
+            block_cooldown(float, optional): Seconds to wait before using
+                a blocked identity again. Defaults to 600.
+            spike_factor(float, optional): A request slower than its average
+                latency multiplied by this factor is a latency spike.
+                Defaults to 3.
+            spike_min_requests(int, optional): Successful requests needed
+                before checking latency spikes. Defaults to 3.
+        """
+
+        if not identities:
+            raise ValueError("Identity pool without identities")
+
+        self.identities = identities
+        self.block_cooldown = block_cooldown
+        self.spike_factor = spike_factor
+        self.spike_min_requests = spike_min_requests
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs):
+        """ Load identities from json file
+
+        Args:
+            path(str): json file with a list of identities
+            [
+                {
+                    "name": str,
+                    "proxy_host": str,
+                    "proxy_port": str,
+                    "cookies": list
+                },
+                ...
+            ]
+            **kwargs: IdentityPool options
+        """
+
+        with open(path, "r", encoding="utf-8") as file:
+            identities_data = json.load(file)
+
+        identities = [Identity(**data) for data in identities_data]
+        return cls(identities, **kwargs)
+
+    def acquire(self, exclude: Identity = None) -> Identity:
+        """ Reserve the healthiest identity free and out of cooldown
+        (or the one with the shortest cooldown, if all are resting)
+
+        Args:
+            exclude(Identity, optional): identity to avoid (the one being
+                rotated), used only if no other identity is ready.
+                Defaults to None.
+
+        Returns:
+            Identity: identity to use
+        """
+
+        with self.lock:
+            free = [
+                identity for identity in self.identities
+                if not identity.in_use
+            ] or self.identities
+
+            now = time()
+            ready = [
+                identity for identity in free
+                if identity.cooldown_until <= now
+            ]
+            others = [
+                identity for identity in ready
+                if identity is not exclude
+            ]
+            if others or ready:
+                identity = max(
+                    others or ready,
+                    key=lambda identity: identity.score
+                )
+            else:
+                identity = min(
+                    free,
+                    key=lambda identity: identity.cooldown_until
+                )
+
+            identity.in_use = True
+            identity.acquired_at = now
+            return identity
+
+    def release(self, identity: Identity):
+        """ Free identity to be used by other worker
+
+        Args:
+            identity(Identity): identity to free
+        """
+
+        with self.lock:
+            if identity.in_use:
+                identity.active_time += time() - identity.acquired_at
+            identity.in_use = False
+
+    def report(self, identity: Identity, success: bool,
+               latency: float = 0) -> bool:
+        """ Save the result of a request made with the identity
+
+        Args:
+            identity(Identity): identity used
+            success(bool): request finished without errors
+            latency(float, optional): request seconds. Defaults to 0.
+
+        Returns:
+            bool: True if the request was a latency spike
+        """
+
+        with self.lock:
+            average_latency = identity.average_latency
+            identity.requests += 1
+            if not success:
+                identity.failures += 1
+                return False
+
+            identity.successes += 1
+            identity.total_latency += latency
+
+            return identity.successes > self.spike_min_requests \
+                and latency > average_latency * self.spike_factor
+
+    def report_block(self, identity: Identity):
+        """ Save that the identity was blocked and rest it for a while
+
+        Args:
+            identity(Identity): blocked identity
+        """
+
+        with self.lock:
+            identity.requests += 1
+            identity.failures += 1
+            identity.blocks += 1
+            identity.cooldown_until = time() + self.block_cooldown
+
+    def print_stats(self):
+        """ Show requests, blocks, latency and throughput of each identity """
+
+        print("\nIdentities:")
+        for identity in self.identities:
+            print(
+                f"\t{identity.name}: "
+                f"{identity.successes}/{identity.requests} ok, "
+                f"{identity.blocks} blocks, "
+                f"{identity.average_latency:.1f}s avg, "
+                f"{identity.throughput:.2f} profiles/min, "
+                f"score {identity.score:.2f}"
+            )
@@ -0,0 +1,146 @@
+import os
+import json
+from time import time
+
+
+class ProfileCache():
+
+    def __init__(self, max_age: float = 86400, cache_path: str = ""):
+        """ Profile details by username, and keywords where each profile
+        was found, to reuse details when a profile appears in other keyword
+
+        Args:
+            max_age(float, optional): Seconds before the details expire.
+                0 to never expire. Defaults to 86400 (1 day).
+            cache_path(str, optional): json lines file to keep the details
+                between runs. Defaults to "" (only in memory).
+        """
+
+        self.max_age = max_age
+        self.cache_path = cache_path
+
+        # username: {"details": dict, "scraped_at": float}
+        self.profiles = {}
+
+        # username: set of keywords
+        self.keyword_hits = {}
+
+        self.__load__()
+
+    def __load__(self):
+        """ Load details saved in cache file (the last ones by username),
+        and rewrite the file without the old and expired entries """
+
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+
+        with open(self.cache_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self.profiles[entry["username"]] = {
+                    "details": entry["details"],
+                    "scraped_at": entry["scraped_at"],
+                }
+
+        self.profiles = {
+            username: cached for username, cached in self.profiles.items()
+            if not self.__is_expired__(cached)
+        }
+
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for username, cached in self.profiles.items():
+                file.write(self.__dump_entry__(username, cached))
+        os.replace(temp_path, self.cache_path)
+
+    def __is_expired__(self, cached: dict) -> bool:
+        """ Check if cached details are older than max_age
+
+        Args:
+            cached(dict): details and scraped_at of the profile
+        """
+
+        return bool(self.max_age) \
+            and time() - cached["scraped_at"] > self.max_age
+
+    def __dump_entry__(self, username: str, cached: dict) -> str:
+        """ Json line of the cache file
+
+        Args:
+            username(str): username of the profile
+            cached(dict): details and scraped_at of the profile
+        """
+
+        entry = {
+            "username": username,
+            "scraped_at": cached["scraped_at"],
+            "details": cached["details"],
+        }
+        return json.dumps(entry, separators=(",", ":")) + "\n"
+
+    def clear(self):
+        """ Delete cached details, keyword hits and cache file """
+
+        self.profiles = {}
+        self.keyword_hits = {}
+        if self.cache_path and os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+    def get(self, username: str) -> dict:
+        """ Details of the profile, if cached and not expired
+
+        Args:
+            username(str): username of the profile
+
+        Returns:
+            dict: profile details (see Scraper.get_profile_details) or None
+        """
+
+        cached = self.profiles.get(username)
+        if not cached:
+            return None
+
+        if self.__is_expired__(cached):
+            return None
+
+        return dict(cached["details"])
+
+    def set(self, username: str, details: dict):
+        """ Save profile details
+
+        Args:
+            username(str): username of the profile
+            details(dict): profile details (see Scraper.get_profile_details)
+        """
+
+        cached = {
+            "details": details,
+            "scraped_at": time(),
+        }
+        self.profiles[username] = cached
+
+        if self.cache_path:
+            with open(self.cache_path, "a", encoding="utf-8") as file:
+                file.write(self.__dump_entry__(username, cached))
+
+    def has_hit(self, keyword: str, username: str) -> bool:
+        """ Check if the profile was already found with the keyword
+
+        Args:
+            keyword(str): keyword searched
+            username(str): username of the profile
+        """
+
+        return keyword in self.keyword_hits.get(username, set())
+
+    def add_hit(self, keyword: str, username: str):
+        """ Save that the profile was found with the keyword
+
+        Args:
+            keyword(str): keyword searched
+            username(str): username of the profile
+        """
+
+        self.keyword_hits.setdefault(username, set()).add(keyword)
@@ -0,0 +1,731 @@
+import os
+import csv
+from time import time
+from libs.chrome_dev import ChromDevWrapper
+from libs.cdp_watchdog import ChromeError
+from libs.identity_pool import IdentityBlockedError
+from libs.profile_cache import ProfileCache
+
+
+class Scraper(ChromDevWrapper):
+    
+    selectors_profile = {
+        "video": {
+            "elem": '[data-e2e="user-post-item-list"] > div',
+            "link": 'a',
+            "badge": '[data-e2e="video-card-badge"]',
+            "image": 'img',
+            "views": '[data-e2e="video-views"]',
+            "title": 'a[title]'
+        },
+        "following": '[data-e2e="following-count"]',
+        "followers": '[data-e2e="followers-count"]',
+        "likes": '[data-e2e="likes-count"]',
+    }
+
+    def __init__(self, chrome_path: str, max_users: int = 10,
+                 max_videos: int = 50, output_path: str = "output",
+                 debug: bool = False, lazy_start: bool = True,
+                 start_killing: bool = False, cache_max_age: float = 86400, cache_path: str = "",
+                 **chrome_options):
+        """ Save settings. Chrome opens with the first search (lazy_start)
+        
+        Args:
+            chrome_path (str): Path of chrome executable
+            max_users (int, optional): Max profiles by keyword. Defaults to 10.
+            max_videos (int, optional): Max videos by profile. Defaults to 50.
+            output_path (str, optional): Folder of the autorun csv files.
+                Defaults to "output".
+            debug (bool, optional): Delete (true) the autorun csv files
+                before start. Defaults to False.
+            lazy_start (bool, optional): Open chrome (true) in the first
+                search instead of now. Defaults to True.
+            start_killing (bool, optional): Kill (true) all chrome windows
+                before open chrome. Defaults to False.
+            cache_max_age (float, optional): Seconds to reuse the details of
+                a profile found in other keyword. 0 to never expire.
+                Defaults to 86400.
+            cache_path (str, optional): File to keep profile details between
+                runs. Defaults to "" (only in memory).
+            **chrome_options: ChromDevWrapper options (port, proxies,
+                timeouts, identity_pool, etc)
+        """
+        
+        super().__init__(
+            chrome_path,
+            lazy_start=lazy_start,
+            start_killing=start_killing,
+            **chrome_options
+        )
+        
+        self.max_users = max_users
+        self.max_videos = max_videos
+        self.debug = debug
+        
+        # Csv paths
+        self.output_path = output_path
+        self.profiles_path = os.path.join(output_path, "profiles.csv")
+        self.videos_path = os.path.join(output_path, "videos.csv")
+        self.keyword_hits_path = os.path.join(output_path, "keyword_hits.csv")
+        
+        # Control variables
+        self.scraped_profiles = []
+        self.profiles_cache = ProfileCache(cache_max_age, cache_path)
+        
+    def __setup_csv__(self):
+        """ Create csv files and load the profiles already saved """
+        
+        os.makedirs(self.output_path, exist_ok=True)
+        
+        # Delete csv files in debug mode
+        if self.debug:
+            if os.path.exists(self.profiles_path):
+                os.remove(self.profiles_path)
+            if os.path.exists(self.videos_path):
+                os.remove(self.videos_path)
+            if os.path.exists(self.keyword_hits_path):
+                os.remove(self.keyword_hits_path)
+            self.profiles_cache.clear()
+        
+        # Create initial csv files
+        self.__create_profiles_csv__()
+        self.__create_videos_csv__()
+        self.__create_keyword_hits_csv__()
+        
+        self.scraped_profiles = self.__get_csv_scraped_profiles__()
+        self.__load_csv_keyword_hits__()
+        
+    def __create_profiles_csv__(self):
+        """ Create profiles csv file if not exists """
+        
+        if os.path.exists(self.profiles_path):
+            return None
+        
+        with open(self.profiles_path, "w", newline='') as file:
+            columns = [
+                "keywords",
+                "username",
+                "nickname",
+                "description",
+                "profile_link",
+                "followers",
+                "following",
+                "likes",
+                "videos_num",
+                "videos_views"
+            ]
+            csv_file = csv.writer(file)
+            csv_file.writerow(columns)
+            
+    def __create_videos_csv__(self):
+        """ Create videos csv file if not exists """
+        
+        if os.path.exists(self.videos_path):
+            return None
+            
+        with open(self.videos_path, "w", newline='') as file:
+            columns = [
+                "username",
+                "link",
+                "badge",
+                "image",
+                "views",
+                "title"
+            ]
+            csv_file = csv.writer(file)
+            csv_file.writerow(columns)
+            
+    def __create_keyword_hits_csv__(self):
+        """ Create keyword hits csv file if not exists """
+        
+        if os.path.exists(self.keyword_hits_path):
+            return None
+            
+        with open(self.keyword_hits_path, "w", newline='') as file:
+            columns = [
+                "keyword",
+                "username"
+            ]
+            csv_file = csv.writer(file)
+            csv_file.writerow(columns)
+            
+    def __load_csv_keyword_hits__(self):
+        """ Load keywords where each profile was found, from csv files """
+        
+        csv_hits = [
+            (self.profiles_path, 0, 1),
+            (self.keyword_hits_path, 0, 1),
+        ]
+        for csv_path, keyword_index, username_index in csv_hits:
+            with open(csv_path, "r", encoding="utf-8") as file:
+                csv_file = csv.reader(file)
+                next(csv_file)
+                for row in csv_file:
+                    self.profiles_cache.add_hit(
+                        row[keyword_index],
+                        row[username_index]
+                    )
+                    
+    def __get_csv_scraped_profiles__(self) -> list:
+        """ get scraped profiles from csv file
+
+        Returns:
+            list: List of usernames
+        """
+        
+        with open(self.profiles_path, "r", encoding="utf-8") as file:
+            csv_file = csv.reader(file)
+            next(csv_file)
+            scraped_profiles = [row[1] for row in csv_file]
+            
+        return scraped_profiles
+            
+    def __load_content__(self, selector_elem: str, max_elem: int,
+                         page_url: str = "") -> int:
+        """ Go down to load page content
+        
+        Args:
+            selector_elem (str): Selector to check if the page has loaded
+        
+        Returns:
+            int: Number of elements loaded
+        """
+        
+        if page_url:
+            self.set_page(page_url)
+            self.wait(3)
+        
+        # Go down until load al required profiles or end of the page
+        while True:
+            
+            old_rows_num = self.count_elems(selector_elem)
+            self.go_down()
+            self.wait(3)
+            new_rows_num = self.count_elems(selector_elem)
+            
+            # End of the page
+            if new_rows_num == old_rows_num:
+                break
+            
+            # Max profiles reached
+            if new_rows_num >= max_elem:
+                break
+            
+        return new_rows_num
+    
+    def __get_clean_counters__(self, counter: str) -> int:
+        """ Convert counters like 4.5K or 4.5M to int """
+        
+        if not counter:
+            return 0
+        
+        if "K" in counter:
+            counter = int(float(counter.replace("K", "")) * 1000)
+        elif "M" in counter:
+            counter = int(float(counter.replace("M", "")) * 1000000)
+        elif "B" in counter:
+            counter = int(float(counter.replace("B", "")) * 1000000000)
+        else:
+            counter = int(counter)
+            
+        return counter
+        
+    def __check_blocked__(self):
+        """ Raise error if the page shows a captcha """
+        
+        selector_captcha = '[id^="captcha"], [class*="captcha-verify"]'
+        if self.count_elems(selector_captcha):
+            raise IdentityBlockedError("Captcha found")
+        
+    def search_profiles(self, keyword: str):
+        """ Search specific keyword in the website and load required profiles
+        
+        Args:
+            keyword (str): Keyword to search
+        """
+        
+        selectors = {
+            "search_bar": '[name="q"]',
+            "search_button": 'button[type="submit"]',
+            "accounts_tab": '[aria-controls="tabs-0-panel-search_account"]'
+        }
+                
+        print(f"\n\nSearching profiles with the keyword: {keyword}")
+        
+        # Load page
+        self.set_page("https://www.tiktok.com/")
+        
+        # Search in page
+        self.wait(3)
+        self.send_data(selectors["search_bar"], keyword)
+        self.wait(1)
+        self.click(selectors["search_button"])
+        self.wait(2)
+        self.__check_blocked__()
+        self.click(selectors["accounts_tab"])
+                
+    def get_profiles(self, keyword: str = "") -> list:
+        """ Return profiles (links and usernames) of the current search page
+        
+        Args:
+            keyword (str, optional): Keyword searched, to skip the profiles
+                already found with it. Defaults to "".
+        
+        Returns:
+            list: List of profiles
+            [
+                {
+                    "username": str,
+                    "nickname": str
+                    "description": str,
+                    "link": str
+                },
+                ...
+            ]
+        """
+        
+        selectors = {
+            "row": '[data-e2e="search-user-container"]',
+            "username": '[data-e2e="search-user-unique-id"]',
+            "nickname": '[data-e2e="search-user-nickname"]',
+            "description": '[data-e2e="search-user-desc"]',
+            "link": 'a',
+        }
+        
+        print("Loading profiles...")
+        
+        profiles_found = self.__load_content__(selectors["row"], self.max_users)
+        
+        print(f"Profiles loaded: {profiles_found}")
+        
+        print("Getting profiles data...")
+        
+        profiles_data = []
+        for index in range(profiles_found):
+            
+            if len(profiles_data) >= self.max_users:
+                break
+            
+            profile_data = {}
+            
+            # Extract user data
+            for selector_name, selector in selectors.items():
+                selector_row = f'{selectors["row"]}:nth-child({index + 1})'
+                selector_elem = f'{selector_row} {selector}'
+                
+                # Skip row selector
+                if selector_name == "row":
+                    continue
+                
+                # Extract text or link
+                if selector_name == "link":
+                    value = self.get_attrib(selector_elem, "href")
+                else:
+                    value = self.get_text(selector_elem)
+                    
+                profile_data[selector_name] = value
+                
+            # Skip profile if already found with this keyword
+            if self.profiles_cache.has_hit(keyword, profile_data["username"]):
+                print(f"\t\tProfile {profile_data['username']} already scraped")
+                continue
+        
+            # Clean profile data
+            profile_data["nickname"] = profile_data["nickname"].split(" · ")[0].strip()
+            profile_data["link"] = f'https://www.tiktok.com{profile_data["link"]}'
+            profile_data["description"] = profile_data["description"].strip()
+            profile_data["description"] = profile_data["description"].replace("\n", " ")
+        
+            # Save profile data
+            profiles_data.append(profile_data)
+            
+        return profiles_data
+    
+    def search_keyword_profiles(self, keyword: str) -> list:
+        """ Search keyword and return the profiles found (see get_profiles)
+        
+        Args:
+            keyword (str): Keyword to search
+        """
+        
+        self.search_profiles(keyword)
+        return self.get_profiles(keyword)
+    
+    def load_profile(self, profile_link: str):
+        """ Open profile and load its videos
+        
+        Args:
+            profile_link (str): Link of the profile
+        """
+        
+        self.__load_content__(
+            self.selectors_profile["video"]["elem"],
+            self.max_videos,
+            profile_link
+        )
+        self.__check_blocked__()
+        
+        # Set zoom and wait
+        self.set_zoom(0.1)
+        self.wait(5)
+        
+    def get_profile_counters(self) -> dict:
+        """ Get counters of the current profile
+        
+        Returns:
+            dict: Counters of the profile
+            {
+                "followers": int,
+                "following": int,
+                "likes": int
+            }
+        """
+        
+        counters = {}
+        for counter_name in ["followers", "following", "likes"]:
+            counter = self.get_text(self.selectors_profile[counter_name])
+            counters[counter_name] = self.__get_clean_counters__(counter)
+            
+        return counters
+    
+    def get_profile_details(self, profile_link: str) -> dict:
+        """ Get general data of the current profile
+        
+        Args:
+            profile_link (str): Link of the profile to extract data
+        
+        Returns:
+            dict: General data of the profile
+            {
+                "followers": int,
+                "following": int,
+                "likes": int,
+                "videos": [
+                    ...,
+                    {
+                        "link": str,
+                        "badge": str,
+                        "image": str,
+                        "views": int,
+                        "title": str
+                    }
+                ],
+                "videos_num": int,
+                "videos_views": int
+            }
+        """
+        
+        self.load_profile(profile_link)
+        details = self.get_profile_counters()
+        
+        # Count and extract videos
+        selector_video = self.selectors_profile["video"]["elem"]
+        details["videos_num"] = self.count_elems(selector_video)
+        details["videos"] = self.get_profile_videos()
+        details["videos_views"] = sum(
+            video["views"] for video in details["videos"]
+        )
+        
+        return details
+    
+    def iter_profile_videos(self, start: int = 0):
+        """ Extract videos of the current profile, one by one
+        
+        Args:
+            start (int, optional): Index of the first video. Defaults to 0.
+        
+        Yields:
+            dict: Video data
+            {
+                "link": str,
+                "badge": str,
+                "image": str,
+                "views": int,
+                "title": str
+            }
+        """
+        
+        selectors_video = self.selectors_profile["video"]
+        selectors_sttribs = {
+            "link": 'href',
+            "image": 'src',
+        }
+        
+        selector_video = selectors_video["elem"]
+        videos_num = self.count_elems(selector_video)
+        for video_index in range(start, min(videos_num, self.max_videos)):
+            
+            video_data = {}
+            
+            selector_current_video = f'{selector_video}:nth-child({video_index + 1})'
+            for selector_name, selector_value in selectors_video.items():
+                selector_elem = f'{selector_current_video} {selector_value}'
+                
+                # Skip elem selector
+                if selector_name == "elem":
+                    continue
+                
+                # Get elems attribs
+                if selector_name in selectors_sttribs:
+                    value = self.get_attrib(
+                        selector_elem,
+                        selectors_sttribs[selector_name]
+                    )
+                else:
+                    value = self.get_text(selector_elem)
+                
+                video_data[selector_name] = value
+                
+            # Fix views
+            video_data["views"] = self.__get_clean_counters__(video_data["views"])
+            
+            yield video_data
+    
+    def get_profile_videos(self) -> list:
+        """ Get videos of the current profile
+        
+        Returns:
+            list: List of videos (see iter_profile_videos)
+        """
+        
+        return list(self.iter_profile_videos())
+    
+    def iter_videos(self, profile_link: str):
+        """ Open profile and extract its videos, one by one.
+        Chrome errors are retried like in iter_profiles, continuing from
+        the last video yielded
+        
+        Args:
+            profile_link (str): Link of the profile
+            
+        Yields:
+            dict: Video data (see iter_profile_videos)
+        """
+        
+        self.start()
+        
+        # Retry the extraction from the last video yielded
+        videos_yielded = 0
+        start = time()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.load_profile(profile_link)
+                for video in self.iter_profile_videos(videos_yielded):
+                    videos_yielded += 1
+                    yield video
+                break
+            except ChromeError as error:
+                try:
+                    self.handle_error(error, attempt)
+                except ChromeError:
+                    print("\t\tSkipping profile: chrome not responding")
+                    self.report_identity(False)
+                    return None
+        self.report_identity(True, time() - start)
+        
+        # Log memory and recycle chrome after the profile
+        try:
+            self.retry(self.govern_resources)
+        except ChromeError:
+            print("\t\tChrome not responding")
+        
+    def iter_profiles(self, keyword: str, known_profiles: list = None):
+        """ Search keyword and extract the details of each profile found,
+        one by one. Profiles already found with the keyword are skipped,
+        and profiles found with other keyword reuse their cached details.
+        
+        Args:
+            keyword (str): Keyword to search
+            known_profiles (list, optional): Usernames whose details the
+                caller already has (like the ones saved in csv). If they
+                are not cached, they are yielded with the search data only
+                (without details keys) and their pages are not opened.
+                Defaults to None.
+            
+        Yields:
+            dict: Profile data (see get_profiles and get_profile_details)
+            {
+                "keyword": str,
+                "username": str,
+                "nickname": str,
+                "description": str,
+                "link": str,
+                "followers": int,
+                "following": int,
+                "likes": int,
+                "videos": list,
+                "videos_num": int,
+                "videos_views": int
+            }
+        """
+        
+        self.start()
+        
+        try:
+            profiles = self.retry(self.search_keyword_profiles, keyword)
+        except ChromeError:
+            print(f"\tSkipping keyword {keyword}: chrome not responding")
+            return None
+        
+        for profile_index, profile in enumerate(profiles, start=1):
+            
+            username = profile["username"]
+            counter = f"{profile_index}/{len(profiles)}"
+            print(f"\tProfile {counter} ({username})...")
+            
+            # Reuse details of profiles found with other keywords
+            profile_details = self.profiles_cache.get(username)
+            if profile_details:
+                print("\t\tDetails found in cache")
+                self.profiles_cache.add_hit(keyword, username)
+                yield {"keyword": keyword, **profile, **profile_details}
+                continue
+            
+            # Details already saved by the caller
+            if known_profiles and username in known_profiles:
+                print("\t\tDetails already saved")
+                self.profiles_cache.add_hit(keyword, username)
+                yield {"keyword": keyword, **profile}
+                continue
+            
+            # Get detailed profile data
+            start = time()
+            try:
+                profile_details = self.retry(
+                    self.get_profile_details,
+                    profile["link"]
+                )
+            except ChromeError:
+                print("\t\tSkipping profile: chrome not responding")
+                self.report_identity(False)
+                continue
+            self.report_identity(True, time() - start)
+            
+            self.profiles_cache.set(username, profile_details)
+            self.profiles_cache.add_hit(keyword, username)
+            yield {"keyword": keyword, **profile, **profile_details}
+            
+            # Log memory and recycle chrome between profiles
+            try:
+                self.retry(self.govern_resources)
+            except ChromeError:
+                print("\t\tChrome not responding")
+    
+    def save_profile(self, username: str, nickname: str, description: str,
+                     profile_link: str, followers: int, following: int, likes: int,
+                     videos_num: int, videos_views: int, keyword: str):
+        """ Save in csv profile data of a single user
+        
+        Args:
+            username (str): Username of the profile
+            nickname (str): Nickname of the profile
+            description (str): Description of the profile
+            profile_link (str): Link of the profile
+            followers (int): Number of followers
+            following (int): Number of following
+            likes (int): Number of likes
+            videos_num (int): Number of videos
+            videos_views (int): Number of videos views
+            keyword (str): Keyword used to search the profile
+        """
+        
+        with open(self.profiles_path, "a", encoding="utf-8", newline='') as file:
+            csv_file = csv.writer(file)
+            row = [
+                keyword,
+                username,
+                nickname,
+                description,
+                profile_link,
+                followers,
+                following,
+                likes,
+                videos_num,
+                videos_views
+            ]
+            csv_file.writerow(row)
+    
+    def save_videos(self, username: str, videos_data: list):
+        """ Save in csv video data of a single user
+        
+        Args:
+            username (str): Username of the profile
+            videos_data (list): List of videos
+            [
+                {
+                    "link": str,
+                    "badge": str,
+                    "image": str,
+                    "views": str,
+                    "title": str
+                },
+                ...
+            ]
+        """
+        
+        with open(self.videos_path, "a", encoding="utf-8", newline='') as file:
+            csv_file = csv.writer(file)
+            for video_data in videos_data:
+                row = [
+                    username,
+                    video_data["link"],
+                    video_data["badge"],
+                    video_data["image"],
+                    video_data["views"],
+                    video_data["title"]
+                ]
+                csv_file.writerow(row)
+    
+    def save_keyword_hit(self, keyword: str, username: str):
+        """ Save in csv that a profile was found with a keyword
+        
+        Args:
+            keyword (str): Keyword used to search the profile
+            username (str): Username of the profile
+        """
+        
+        with open(self.keyword_hits_path, "a", encoding="utf-8", newline='') as file:
+            csv_file = csv.writer(file)
+            csv_file.writerow([keyword, username])
+    
+    def autorun(self, keywords: list):
+        """ Scrape all the keywords and save the profiles in csv files
+        
+        Args:
+            keywords (list): Keywords to search
+        """
+        
+        self.__setup_csv__()
+        
+        for keyword in keywords:
+            profiles = self.iter_profiles(keyword, self.scraped_profiles)
+            for profile in profiles:
+                
+                self.save_keyword_hit(keyword, profile["username"])
+                
+                # Profile already saved with other keyword
+                if profile["username"] in self.scraped_profiles:
+                    continue
+                
+                # Save profile details
+                self.save_profile(
+                    profile["username"],
+                    profile["nickname"],
+                    profile["description"],
+                    profile["link"],
+                    profile["followers"],
+                    profile["following"],
+                    profile["likes"],
+                    profile["videos_num"],
+                    profile["videos_views"],
+                    keyword,
+                )
+                
+                # Save videos details
+                self.save_videos(profile["username"], profile["videos"])
+                self.scraped_profiles.append(profile["username"])
+        
+        if self.identity_pool:
+            self.identity_pool.print_stats()
+                            
+        print("Finished!")
@@ -0,0 +1,112 @@
+import re
+import json
+import pytest
+
+
+class FakeDomain():
+
+    def __init__(self, chrome, domain):
+        self.chrome = chrome
+        self.domain = domain
+
+    def __getattr__(self, method):
+
+        def command(**params):
+            if self.chrome.error:
+                raise self.chrome.error
+            self.chrome.calls += 1
+            name = f"{self.domain}.{method}"
+            if name in self.chrome.error_replies:
+                error = self.chrome.error_replies[name]
+                reply = {"code": -32000, "message": error}
+                return ({"id": self.chrome.calls, "error": reply}, [])
+
+            result = {}
+            if name == "Page.navigate":
+                self.chrome.pages.append(params["url"])
+            elif self.domain == "Runtime":
+                value = self.chrome.evaluate(params["expression"])
+                result = {"result": {"type": "string", "value": value}}
+            elif self.domain == "DOM":
+                result = {"root": {"nodeId": 1}, "nodeId": 2}
+            elif self.domain == "Performance":
+                result = {"metrics": [{"name": "Nodes", "value": 100}]}
+            return ({"id": self.chrome.calls, "result": result}, [])
+
+        return command
+
+
+class FakeWebSocket():
+
+    def __init__(self, chrome):
+        self.chrome = chrome
+        self.received = []
+
+    def send(self, data):
+        message = json.loads(data)
+        domain, method = message["method"].split(".")
+        chrome_domain = getattr(self.chrome, domain)
+        result, _ = getattr(chrome_domain, method)(**message["params"])
+        self.received.append({**result, "id": message["id"]})
+
+    def recv(self):
+        return json.dumps(self.received.pop(0))
+
+    def settimeout(self, timeout):
+        pass
+
+
+class FakeChrome():
+    """ PyChromeDevTools interface with a tiktok search of 2 profiles """
+
+    def __init__(self, port=9222, timeout=10):
+        self.calls = 0
+        self.timeout = timeout
+        self.message_counter = 0
+        self.error = None  # exception to raise in the next calls
+        self.error_replies = {}  # method: error message
+        self.pending = []  # events to receive before the next command
+        self.pages = []  # urls opened
+        self.tabs = [{"id": "tab"}]
+        self.ws = FakeWebSocket(self)
+
+    def __getattr__(self, attr):
+        return FakeDomain(self, attr)
+
+    def evaluate(self, expression):
+        if ".length" in expression:
+            if "captcha" in expression:
+                return 0
+            if "search-user" in expression:
+                return 2
+            return 3
+        if "-count" in expression:
+            return "1.5K"
+        if "video-views" in expression:
+            return "10"
+        if "nth-child" in expression and "search-user" in expression:
+            index = re.search(r"nth-child\((\d+)\)", expression).group(1)
+            if "unique-id" in expression:
+                return f"user{index}"
+            if "'href'" in expression:
+                return f"/@user{index}"
+        return "text"
+
+    def pop_messages(self):
+        messages, self.pending = self.pending, []
+        return messages
+
+    def wait_event(self, event, timeout=None):
+        if self.error:
+            raise self.error
+        return ({"method": event}, [])
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_chrome():
+    """ FakeChrome class, to replace PyChromeDevTools.ChromeInterface """
+
+    return FakeChrome
@@ -0,0 +1,91 @@
+import pytest
+from libs.cdp_traffic import CdpRecorder, CdpReplayer, ReplayError
+
+
+def record(chrome, path):
+    """ Record a small session and return its responses """
+
+    recorder = CdpRecorder(chrome(), path)
+    responses = [
+        recorder.Page.navigate(url="https://www.tiktok.com/"),
+        recorder.wait_event("Page.frameStoppedLoading", timeout=60),
+        recorder.Runtime.evaluate(expression="document.title"),
+    ]
+    recorder.close()
+    return responses
+
+
+@pytest.mark.parametrize("file_name", ["traffic.jsonl", "traffic.jsonl.gz"])
+def test_replay_returns_recorded_responses(tmp_path, file_name, fake_chrome):
+    path = str(tmp_path / file_name)
+    recorded = record(fake_chrome, path)
+
+    replayer = CdpReplayer(path)
+    replayed = [
+        replayer.Page.navigate(url="https://www.tiktok.com/"),
+        replayer.wait_event("Page.frameStoppedLoading", timeout=60),
+        replayer.Runtime.evaluate(expression="document.title"),
+    ]
+
+    assert replayed == recorded
+
+
+def test_replay_rejects_other_method(tmp_path, fake_chrome):
+    path = str(tmp_path / "traffic.jsonl")
+    record(fake_chrome, path)
+
+    replayer = CdpReplayer(path)
+    with pytest.raises(ReplayError):
+        replayer.Runtime.evaluate(expression="document.title")
+
+
+def test_replay_rejects_other_params(tmp_path, fake_chrome):
+    path = str(tmp_path / "traffic.jsonl")
+    record(fake_chrome, path)
+
+    replayer = CdpReplayer(path)
+    replayer.Page.navigate(url="https://www.tiktok.com/")
+    replayer.wait_event("Page.frameStoppedLoading")
+    with pytest.raises(ReplayError):
+        replayer.Runtime.evaluate(expression="document.body.innerText")
+
+
+def test_replay_rejects_extra_calls(tmp_path, fake_chrome):
+    path = str(tmp_path / "traffic.jsonl")
+    record(fake_chrome, path)
+
+    replayer = CdpReplayer(path)
+    replayer.Page.navigate(url="https://www.tiktok.com/")
+    replayer.wait_event("Page.frameStoppedLoading")
+    replayer.Runtime.evaluate(expression="document.title")
+    with pytest.raises(ReplayError):
+        replayer.Page.reload()
+
+
+def test_replay_returns_recorded_values(tmp_path, fake_chrome):
+    path = str(tmp_path / "traffic.jsonl")
+    recorder = CdpRecorder(fake_chrome(), path)
+    recorder.record_value("chrome_rss_mb", 5120.5)
+    recorder.close()
+
+    replayer = CdpReplayer(path)
+    assert replayer.replay_value("chrome_rss_mb") == 5120.5
+
+
+def test_replay_raises_recorded_errors(tmp_path, fake_chrome):
+    path = str(tmp_path / "traffic.jsonl")
+    chrome = fake_chrome()
+    chrome.error = ConnectionResetError("Connection reset by peer")
+
+    recorder = CdpRecorder(chrome, path)
+    with pytest.raises(ConnectionResetError):
+        recorder.Page.navigate(url="https://www.tiktok.com/")
+    with pytest.raises(ConnectionResetError):
+        recorder.wait_event("Page.frameStoppedLoading", timeout=60)
+    recorder.close()
+
+    replayer = CdpReplayer(path)
+    with pytest.raises(ConnectionResetError, match="reset by peer"):
+        replayer.Page.navigate(url="https://www.tiktok.com/")
+    with pytest.raises(ConnectionResetError):
+        replayer.wait_event("Page.frameStoppedLoading", timeout=60)
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("websocket")
+
+from libs.cdp_watchdog import (  # noqa: E402
+    CdpConnection, CdpWatchdog, ChromeCommandError, ChromeCrashedError,
+    ChromeError
+)
+
+
+def test_command_returns_response(fake_chrome):
+    watchdog = CdpWatchdog(CdpConnection(fake_chrome()), 10)
+
+    result, _ = watchdog.Runtime.evaluate(expression="document.title")
+
+    assert result["result"]["result"]["value"] == "text"
+
+
+def test_crash_received_before_command(fake_chrome):
+    chrome = fake_chrome()
+    watchdog = CdpWatchdog(CdpConnection(chrome), 10)
+
+    # Crash event received while the scraper was waiting
+    chrome.pending = [{"method": "Inspector.targetCrashed", "params": {}}]
+    with pytest.raises(ChromeCrashedError):
+        watchdog.Runtime.evaluate(expression="document.title")
+
+
+def test_error_reply_is_not_timeout(fake_chrome):
+    chrome = fake_chrome(timeout=60)
+    chrome.error_replies = {"DOM.focus": "Could not find node with given id"}
+    watchdog = CdpWatchdog(CdpConnection(chrome), 60)
+
+    with pytest.raises(ChromeCommandError, match="Could not find node"):
+        watchdog.DOM.focus(nodeId=0)
+
+
+def test_transport_error_is_chrome_error(fake_chrome):
+    chrome = fake_chrome()
+    chrome.error = ConnectionResetError("Connection reset by peer")
+    watchdog = CdpWatchdog(CdpConnection(chrome), 10)
+
+    with pytest.raises(ChromeError):
+        watchdog.Page.navigate(url="https://www.tiktok.com/")
@@ -0,0 +1,42 @@
+import threading
+from urllib.request import ProxyHandler, build_opener
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from libs.forward_proxy import ForwardProxy
+
+
+class PageHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = f"page {self.path}".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_forward_proxy_round_trip(monkeypatch):
+    monkeypatch.delenv("no_proxy", raising=False)
+    monkeypatch.delenv("NO_PROXY", raising=False)
+
+    server = HTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    proxy = ForwardProxy(0)
+    proxy.start()
+
+    proxy_url = f"http://127.0.0.1:{proxy.server_address[1]}"
+    opener = build_opener(ProxyHandler({"http": proxy_url}))
+    page_url = f"http://127.0.0.1:{server.server_address[1]}/search?q=1"
+    try:
+        for _ in range(2):
+            with opener.open(page_url, timeout=10) as response:
+                assert response.read() == b"page /search?q=1"
+    finally:
+        proxy.shutdown()
+        proxy.server_close()
+        server.shutdown()
+        server.server_close()
+
+    assert proxy.requests == 2
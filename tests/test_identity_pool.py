@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("websocket")
+
+from libs.identity_pool import Identity, IdentityPool  # noqa: E402
+
+
+def make_pool(**options):
+    identities = [Identity(name) for name in ("a", "b", "c")]
+    return IdentityPool(identities, **options), identities
+
+
+def test_acquire_healthiest_free_identity():
+    pool, (a, b, c) = make_pool()
+    b.successes = b.requests = 5
+
+    assert pool.acquire() is b
+    assert pool.acquire() in (a, c)
+
+
+def test_acquire_exclude():
+    pool, (a, b, c) = make_pool()
+    a.successes = a.requests = 5
+    pool.acquire()
+    pool.release(a)
+
+    # Rotating away from "a" chooses other identity, even if healthier
+    assert pool.acquire(exclude=a) is not a
+
+
+def test_acquire_exclude_when_others_are_resting():
+    pool, (a, b, c) = make_pool()
+    pool.report_block(b)
+    pool.report_block(c)
+
+    assert pool.acquire(exclude=a) is a
+
+
+def test_acquire_skips_cooldown():
+    pool, (a, b, c) = make_pool(block_cooldown=600)
+    pool.report_block(a)
+    pool.report_block(b)
+
+    assert pool.acquire() is c
+    pool.release(c)
+    pool.report_block(c)
+
+    # All resting: the first to finish its cooldown
+    assert pool.acquire() is a
+
+
+def test_report_block():
+    pool, (a, b, c) = make_pool(block_cooldown=600)
+    pool.report_block(a)
+
+    assert a.blocks == 1
+    assert a.failures == a.requests == 1
+    assert a.cooldown_until > 0
+    assert a.score < b.score
+
+
+def test_report_spike():
+    pool, (a, b, c) = make_pool(spike_factor=3, spike_min_requests=3)
+
+    # Not enough requests to know the average latency
+    assert not pool.report(a, True, 1)
+    assert not pool.report(a, True, 10)
+
+    for _ in range(3):
+        assert not pool.report(a, True, 1)
+    assert pool.report(a, True, 20)
+    assert not pool.report(a, False)
+    assert a.failures == 1
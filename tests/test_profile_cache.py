@@ -0,0 +1,81 @@
+import json
+from libs.profile_cache import ProfileCache
+
+DETAILS = {"followers": 1500, "following": 10, "likes": 300}
+
+
+def test_get_saved_details():
+    cache = ProfileCache()
+    cache.set("user1", DETAILS)
+
+    assert cache.get("user1") == DETAILS
+    assert cache.get("user2") is None
+
+
+def test_expired_details():
+    cache = ProfileCache(max_age=60)
+    cache.set("user1", DETAILS)
+
+    cache.profiles["user1"]["scraped_at"] -= 61
+    assert cache.get("user1") is None
+
+
+def test_details_never_expire_with_max_age_0():
+    cache = ProfileCache(max_age=0)
+    cache.set("user1", DETAILS)
+
+    cache.profiles["user1"]["scraped_at"] = 0
+    assert cache.get("user1") == DETAILS
+
+
+def test_load_saved_details(tmp_path):
+    path = str(tmp_path / "profiles_cache.jsonl")
+    cache = ProfileCache(cache_path=path)
+    cache.set("user1", {"followers": 1})
+    cache.set("user1", DETAILS)
+    cache.set("user2", DETAILS)
+
+    loaded = ProfileCache(cache_path=path)
+    assert loaded.get("user1") == DETAILS
+    assert loaded.get("user2") == DETAILS
+
+
+def test_load_compacts_cache_file(tmp_path):
+    path = tmp_path / "profiles_cache.jsonl"
+    cache = ProfileCache(max_age=60, cache_path=str(path))
+    for followers in range(5):
+        cache.set("user1", {"followers": followers})
+    cache.set("user2", DETAILS)
+
+    # Expired entry
+    with open(path, "a", encoding="utf-8") as file:
+        entry = {"username": "user3", "scraped_at": 0, "details": DETAILS}
+        file.write(json.dumps(entry) + "\n")
+
+    ProfileCache(max_age=60, cache_path=str(path))
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [entry["username"] for entry in entries] == ["user1", "user2"]
+    assert entries[0]["details"] == {"followers": 4}
+
+
+def test_clear(tmp_path):
+    path = tmp_path / "profiles_cache.jsonl"
+    cache = ProfileCache(cache_path=str(path))
+    cache.set("user1", DETAILS)
+    cache.add_hit("pasteles", "user1")
+
+    cache.clear()
+
+    assert cache.get("user1") is None
+    assert not cache.has_hit("pasteles", "user1")
+    assert not path.exists()
+    assert ProfileCache(cache_path=str(path)).profiles == {}
+
+
+def test_keyword_hits():
+    cache = ProfileCache()
+    cache.add_hit("pasteles", "user1")
+
+    assert cache.has_hit("pasteles", "user1")
+    assert not cache.has_hit("tortas", "user1")
+    assert not cache.has_hit("pasteles", "user2")
@@ -0,0 +1,92 @@
+import pytest
+
+PyChromeDevTools = pytest.importorskip("PyChromeDevTools")
+pytest.importorskip("psutil")
+pytest.importorskip("websocket")
+
+from libs.scraper import Scraper  # noqa: E402
+from libs.cdp_watchdog import ChromeError  # noqa: E402
+
+
+def scrape(**options):
+    scraper = Scraper(
+        "", max_users=2, max_videos=2, start_chrome=False,
+        start_killing=False, **options
+    )
+    scraper.wait = lambda seconds: None
+    profiles = list(scraper.iter_profiles("pasteles"))
+    videos = list(scraper.iter_videos("https://www.tiktok.com/@user1"))
+    return scraper, profiles, videos
+
+
+def test_replay_reproduces_recorded_scrape(tmp_path, monkeypatch, fake_chrome):
+    path = str(tmp_path / "traffic.jsonl.gz")
+    monkeypatch.setattr(PyChromeDevTools, "ChromeInterface", fake_chrome)
+
+    recorder, profiles, videos = scrape(record_path=path)
+    recorder.chrome.close()
+    assert [profile["username"] for profile in profiles] == ["user1", "user2"]
+    assert profiles[0]["followers"] == 1500
+    assert len(videos) == 2
+
+    # Chrome is not needed to replay
+    monkeypatch.delattr(PyChromeDevTools, "ChromeInterface")
+    _, replayed_profiles, replayed_videos = scrape(replay_path=path)
+
+    assert replayed_profiles == profiles
+    assert replayed_videos == videos
+
+
+def test_start_again_after_failed_setup(monkeypatch, fake_chrome):
+    monkeypatch.setattr(PyChromeDevTools, "ChromeInterface", fake_chrome)
+    scraper = Scraper("", start_chrome=False)
+
+    def fail():
+        raise ChromeError("Network.enable without response after 10s")
+
+    monkeypatch.setattr(scraper, "__enable_domains__", fail)
+    with pytest.raises(ChromeError):
+        scraper.start()
+    assert scraper.chrome_interface is None
+
+    monkeypatch.delattr(scraper, "__enable_domains__")
+    scraper.start()
+    assert scraper.chrome_interface is not None
+
+
+def profile_pages(scraper):
+    return [url for url in scraper.chrome.pages if "/@" in url]
+
+
+def test_second_keyword_reuses_cached_details(tmp_path, monkeypatch,
+                                              fake_chrome):
+    monkeypatch.setattr(PyChromeDevTools, "ChromeInterface", fake_chrome)
+    scraper = Scraper(
+        "", max_users=2, start_chrome=False,
+        cache_path=str(tmp_path / "profiles_cache.jsonl")
+    )
+    scraper.wait = lambda seconds: None
+
+    first = list(scraper.iter_profiles("pasteles"))
+    assert len(profile_pages(scraper)) == 2
+
+    second = list(scraper.iter_profiles("tortas"))
+    assert len(profile_pages(scraper)) == 2
+    assert [profile["keyword"] for profile in second] == ["tortas"] * 2
+    assert second[0]["followers"] == first[0]["followers"]
+
+
+def test_known_profiles_are_not_opened(monkeypatch, fake_chrome):
+    monkeypatch.setattr(PyChromeDevTools, "ChromeInterface", fake_chrome)
+    scraper = Scraper("", max_users=2, start_chrome=False)
+    scraper.wait = lambda seconds: None
+
+    profiles = list(scraper.iter_profiles(
+        "pasteles",
+        known_profiles=["user1", "user2"]
+    ))
+
+    assert [profile["username"] for profile in profiles] == ["user1", "user2"]
+    assert "followers" not in profiles[0]
+    assert profile_pages(scraper) == []
+    assert scraper.profiles_cache.has_hit("pasteles", "user1")